@@ -1,6 +1,9 @@
+import multiprocessing
 import os
 import re
-from functools import partial
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
 from keyword import kwlist
 from typing import List, Optional, Tuple
 
@@ -19,18 +22,23 @@ from lang.py.types import FBSPyType, listify, optionalize
 
 PYTHON_TEMPLATE = "fbs_template.py.j2"
 
+_INT_RE = re.compile(r"int\d")
+
+# Rendered templates are streamed into the output file chunk by chunk
+_WRITE_BUFFER = 65536
+
 
 def c_int_from_fbs_type(fbs_type: FBSType) -> Optional[str]:
     if fbs_type in FBSType._PRIMITIVE_TYPES:
         py_type = FBSPyType._VALUES_TO_PY_TYPES[fbs_type]
-        if re.search(r"int\d", py_type):
+        if _INT_RE.search(py_type):
             return py_type
     return None
 
 
 def c_int_types(module) -> List:
     """Figure out what int types need to be imported from ctypes"""
-    c_types = []
+    c_types = {}
     for namespace in _NAMESPACE_TO_TYPE.keys():
         for t in module.__fbs_meta__[namespace]:
             if namespace == "unions":
@@ -38,26 +46,26 @@ def c_int_types(module) -> List:
             if namespace == "enums":
                 py_type = c_int_from_fbs_type(t._FBSType)
                 if py_type:
-                    c_types.append(py_type)
+                    c_types[py_type] = None
                 continue
             for _, mtype in t._fspec.items():
                 fbs_type = mtype[1]
                 py_type = c_int_from_fbs_type(fbs_type)
                 if py_type:
-                    c_types.append(py_type)
-    return c_types
+                    c_types[py_type] = None
+    return list(c_types)
 
 
 # Should be compatible with GenTypeBasic() upstream
 def py_gen_type(fbs_type) -> str:
-    return FBSType._VALUES_TO_PY_C_TYPES[fbs_type]
+    return FBSPyType._VALUES_TO_PY_C_TYPES[fbs_type]
 
 
 # Should be compatible with GenMethod() upstream
 def py_gen_method(fbs_type) -> str:
     is_primitive = fbs_type in FBSType._PRIMITIVE_TYPES
     if is_primitive:
-        return camel_case(py_gen_type(fbs_type))
+        return _CAMEL_C_TYPES[fbs_type]
     elif fbs_type == FBSType.STRUCT:
         return "Struct"
     else:
@@ -66,11 +74,7 @@ def py_gen_method(fbs_type) -> str:
 
 # Similar to, but not compatible with GenGetter() upstream
 def py_gen_getter(fbs_type) -> Tuple[str, Tuple]:
-    if fbs_type == FBSType.STRING:
-        return ("String", ())
-    elif fbs_type == FBSType.UNION or fbs_type == FBSType.ENUM:
-        return ("Get", ("flatbuffers.number_types.{}Flags".format("Int8"),))
-    elif fbs_type == FBSType.VECTOR:
+    if fbs_type == FBSType.VECTOR:
         _, _, _, element_type, _ = parse_types(fbs_type, get_type(fbs_type))
         return (
             "Get",
@@ -80,71 +84,147 @@ def py_gen_getter(fbs_type) -> Tuple[str, Tuple]:
                 ),
             ),
         )
-    else:
-        return (
-            "Get",
-            (
-                "flatbuffers.number_types.{}Flags".format(
-                    camel_case(py_gen_type(fbs_type))
-                ),
-            ),
-        )
+    return _GETTER_TABLE[fbs_type]
 
 
+@lru_cache(maxsize=None)
 def camel_case(text: str) -> str:
     return "".join([x.title() for x in text.split("_")])
 
 
+# py_gen_*() only depend on the FBSType, so precompute them. Vector getters
+# depend on the element type and still go through py_gen_getter().
+_CAMEL_C_TYPES = {
+    t: camel_case(c_type) for t, c_type in FBSPyType._VALUES_TO_PY_C_TYPES.items()
+}
+_TYPE_TABLE = FBSPyType._VALUES_TO_PY_C_TYPES
+_METHOD_TABLE = {t: py_gen_method(t) for t in FBSPyType._VALUES_TO_PY_C_TYPES}
+_GETTER_TABLE = {
+    t: ("Get", (f"flatbuffers.number_types.{camel}Flags",))
+    for t, camel in _CAMEL_C_TYPES.items()
+    if t != FBSType.VECTOR
+}
+_GETTER_TABLE[FBSType.STRING] = ("String", ())
+_INT8_GETTER = ("Get", ("flatbuffers.number_types.Int8Flags",))
+_GETTER_TABLE[FBSType.UNION] = _INT8_GETTER
+_GETTER_TABLE[FBSType.ENUM] = _INT8_GETTER
+
+
+# (templates, ctx, fbs_meta) inherited by forked render workers
+_render_state = None
+
+
+def _init_render_worker(state):
+    global _render_state
+    _render_state = state
+
+
+def _render_file(state, key, namespace, index, out_file):
+    """Render one table/union/enum of the module into out_file"""
+    tmpls, ctx, fbs_meta = state
+    ctx[key] = fbs_meta[namespace][index]
+    with open(out_file, "w", buffering=_WRITE_BUFFER) as target:
+        tmpls[key].stream(ctx).dump(target)
+
+
+def _render_file_in_worker(*job):
+    _render_file(_render_state, *job)
+
+
 def generate_py(
     path,
     tree,
     templates=[PYTHON_TEMPLATE, None, None],
     separate=False,
+    jobs=1,
 ):
+    """Generate Python code for tree from the fbs file at path.
+
+    With separate=True, every table, union and enum is rendered into its own
+    file, using up to jobs worker processes. Workers are forked so that they
+    inherit the parsed module, which can't be pickled; on platforms other than
+    Linux rendering is always sequential.
+    """
     (prefix, env) = pre_generate_step(path)
     if not os.path.exists(prefix):
         os.mkdir(prefix)
         open(os.path.join(prefix, "__init__.py"), "a").close()
     table_template, union_template, enum_template = templates
-    setattr(tree, "module", tree)
     pre_process_module(tree, kwlist)
-    # Type related methods
+    # get_type() looks up FBSType on the module for vector element types
     setattr(tree, "FBSType", FBSType)
-    setattr(tree, "python_types", FBSPyType._VALUES_TO_PY_TYPES)
-    setattr(
-        tree, "get_type", partial(get_type, primitive=tree.python_types, optionalize=optionalize, listify=listify, module=tree)
+    python_types = FBSPyType._VALUES_TO_PY_TYPES
+    # Same answer for every render, so walk the module only once
+    int_types = c_int_types(tree)
+    # Shared by every render; only the per-file entry changes between them
+    ctx = dict(tree.__dict__)
+    ctx.update(
+        {
+            "module": tree,
+            # Type related methods
+            "FBSType": FBSType,
+            "python_types": python_types,
+            "get_type": partial(
+                get_type,
+                primitive=python_types,
+                optionalize=optionalize,
+                listify=listify,
+                module=tree,
+            ),
+            "get_module_name": partial(get_module_name, module=tree),
+            "get_bases": partial(get_bases, module=tree),
+            "lookup_fbs_type": lookup_fbs_type,
+            "parse_types": parse_types,
+            "c_int_types": lambda: int_types,
+            # Strings
+            "camel_case": camel_case,
+            "python_reserved": kwlist,
+            # Python specific
+            "py_gen_type": py_gen_type,
+            "py_gen_method": py_gen_method,
+            "py_gen_getter": py_gen_getter,
+            "py_gen_types": _TYPE_TABLE,
+            "py_gen_methods": _METHOD_TABLE,
+            "py_gen_getters": _GETTER_TABLE,
+        }
     )
-    setattr(tree, "get_module_name", partial(get_module_name, module=tree))
-    setattr(tree, "get_bases", partial(get_bases, module=tree))
-    setattr(tree, "lookup_fbs_type", lookup_fbs_type)
-    setattr(tree, "parse_types", parse_types)
-    setattr(tree, "c_int_types", partial(c_int_types, module=tree))
-    # Strings
-    setattr(tree, "camel_case", camel_case)
-    setattr(tree, "python_reserved", kwlist)
-    # Python specific
-    setattr(tree, "py_gen_type", py_gen_type)
-    setattr(tree, "py_gen_method", py_gen_method)
-    setattr(tree, "py_gen_getter", py_gen_getter)
+    table_tmpl = env.get_template(table_template)
     if not separate:
         _, filename = os.path.split(path)
         py_filename = os.path.splitext(filename)[0] + ".py"
         out_file = os.path.join(prefix, py_filename)
-        with open(out_file, "w") as target:
-            target.write(env.get_template(table_template).render(tree.__dict__))
+        with open(out_file, "w", buffering=_WRITE_BUFFER) as target:
+            table_tmpl.stream(ctx).dump(target)
+        return
+    tmpls = {
+        "table": table_tmpl,
+        "fbs_union": env.get_template(union_template) if union_template else None,
+        "fbs_enum": env.get_template(enum_template) if enum_template else None,
+    }
+    namespaces = [
+        ("table", "tables"),
+        ("fbs_union", "unions"),
+        ("fbs_enum", "enums"),
+    ]
+    render_jobs = [
+        (key, namespace, index, os.path.join(prefix, t.__name__ + ".py"))
+        for key, namespace in namespaces
+        for index, t in enumerate(tree.__fbs_meta__[namespace])
+    ]
+    state = (tmpls, ctx, tree.__fbs_meta__)
+    # fork is available but unsafe on macOS, so only use workers on Linux
+    if jobs > 1 and sys.platform.startswith("linux"):
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_init_render_worker,
+            initargs=(state,),
+        ) as executor:
+            futures = [
+                executor.submit(_render_file_in_worker, *job) for job in render_jobs
+            ]
+            for future in futures:
+                future.result()
         return
-    for table in tree.__fbs_meta__["tables"]:
-        out_file = os.path.join(prefix, table.__name__ + ".py")
-        with open(out_file, "w") as target:
-            setattr(tree, "table", table)
-            target.write(env.get_template(table_template).render(tree.__dict__))
-    for fbs_union in tree.__fbs_meta__["unions"]:
-        out_file = os.path.join(prefix, fbs_union.__name__ + ".py")
-        with open(out_file, "w") as target:
-            setattr(tree, "fbs_union", fbs_union)
-            target.write(env.get_template(union_template).render(tree.__dict__))
-    for fbs_enum in tree.__fbs_meta__["enums"]:
-        out_file = os.path.join(prefix, fbs_enum.__name__ + ".py")
-        with open(out_file, "w") as target:
-            setattr(tree, "fbs_enum", fbs_enum)
-            target.write(env.get_template(enum_template).render(tree.__dict__))
+    for job in render_jobs:
+        _render_file(state, *job)
@@ -2,7 +2,6 @@
 from ctypes import (
     c_int16 as int16,
     c_uint64 as uint64,
-    c_int16 as int16,
     c_int8 as int8,
 )
 from dataclasses import dataclass
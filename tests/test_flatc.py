@@ -1,8 +1,10 @@
 import os
 import unittest
 
+from fbs.fbs import FBSType
 from fbs.parser import load
 from lang.kt.generate import generate_kt
+from lang.py import generate as py_generate
 from lang.py.generate import generate_py
 from lang.rust.generate import generate_rust
 from lang.swift.generate import generate_swift
@@ -50,6 +52,96 @@ class CodeGeneratorTests(unittest.TestCase):
             with open("tests/expected/golden-color.py") as f2:
                 self.assertEqual(f2.read(), f1.read())
 
+    def test_py_separate(self):
+        templates = [
+            "tests/templates/separate_table.py.j2",
+            "tests/templates/separate_union.py.j2",
+            "tests/templates/separate_enum.py.j2",
+        ]
+        outputs = []
+        for jobs in (1, 2):
+            generate_py(
+                self.TEST_CASE,
+                load(self.TEST_CASE),
+                templates,
+                separate=True,
+                jobs=jobs,
+            )
+            files = {}
+            for name in sorted(os.listdir("color")):
+                with open(os.path.join("color", name)) as f:
+                    files[name] = f.read()
+                # __init__.py is only written when the directory is created
+                if name != "__init__.py":
+                    os.remove(os.path.join("color", name))
+            outputs.append(files)
+        os.remove("color/__init__.py")
+        self.assertEqual(outputs[0], outputs[1])
+        files = outputs[0]
+        self.assertEqual(
+            [
+                "Animal.py",
+                "Color.py",
+                "Colorophile.py",
+                "Item.py",
+                "NamedAnimal.py",
+                "Person.py",
+                "Product.py",
+                "__init__.py",
+            ],
+            list(files),
+        )
+        self.assertEqual(
+            "class Color(Enum):\n    Red = 1\n    Green = 2\n    Blue = 3\n",
+            files["Color.py"],
+        )
+        self.assertEqual(
+            "class Person:\n"
+            "    address: str\n"
+            "    age: int16\n"
+            "    favorite_color: Color\n",
+            files["Person.py"],
+        )
+        self.assertEqual(
+            "class Animal:\n    name: str\n    length: uint64\n", files["Animal.py"]
+        )
+        self.assertEqual("Item = Union[Product, Person]", files["Item.py"])
+
+
+class PyGenHelperTests(unittest.TestCase):
+    TYPES = [FBSType.BOOL, FBSType.INT, FBSType.STRING, FBSType.STRUCT, FBSType.UNION]
+
+    def test_py_gen_type(self):
+        self.assertEqual(
+            ["bool", "int32", "int", "int", "int"],
+            [py_generate.py_gen_type(t) for t in self.TYPES],
+        )
+
+    def test_py_gen_method(self):
+        self.assertEqual(
+            ["Bool", "Int32", "Int", "Struct", "UOffsetTRelative"],
+            [py_generate.py_gen_method(t) for t in self.TYPES],
+        )
+
+    def test_py_gen_getter(self):
+        self.assertEqual(
+            [
+                ("Get", ("flatbuffers.number_types.BoolFlags",)),
+                ("Get", ("flatbuffers.number_types.Int32Flags",)),
+                ("String", ()),
+                ("Get", ("flatbuffers.number_types.IntFlags",)),
+                ("Get", ("flatbuffers.number_types.Int8Flags",)),
+            ],
+            [py_generate.py_gen_getter(t) for t in self.TYPES],
+        )
+
+    def test_py_gen_tables(self):
+        for t in self.TYPES:
+            self.assertEqual(py_generate.py_gen_type(t), py_generate._TYPE_TABLE[t])
+            self.assertEqual(py_generate.py_gen_method(t), py_generate._METHOD_TABLE[t])
+            self.assertEqual(py_generate.py_gen_getter(t), py_generate._GETTER_TABLE[t])
+        self.assertNotIn(FBSType.VECTOR, py_generate._GETTER_TABLE)
+
 
 if __name__ == "__main__":
     unittest.main()